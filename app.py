@@ -1,27 +1,80 @@
 from flask import Flask, render_template, request, jsonify, send_file, Response
 import os
+import re
 import tempfile
-import base64
 import json
+import gzip
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from io import BytesIO
 
-from textract_processor import extract_text_from_pdf, extract_text_from_pdf_bytes, extract_structured_data_from_pdf_bytes
+# textract_processor shares one pooled boto3 Textract/S3 client pair across requests
+from textract_processor import extract_text_from_pdf, extract_text_from_pdf_bytes, extract_structured_data_from_pdf_stream, start_structured_data_extraction, get_structured_data_extraction
 from llm_processor import process_text_with_llm
-from structured_llm_processor import process_structured_data_with_llm
+from structured_llm_processor import cached_process_structured_data_with_llm
 from export_utils import export_to_pdf
 
 app = Flask(__name__)
 
+# Serialise JSON responses compactly and skip key sorting on large payloads
+app.json.compact = True
+app.json.sort_keys = False
+
+# Reject oversized uploads before the body is read into memory
+MAX_UPLOAD_BYTES = 50 * 1024 * 1024
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_BYTES
+
 # Ensure templates directory exists
 os.makedirs('templates', exist_ok=True)
 os.makedirs('static', exist_ok=True)
 
+@app.errorhandler(413)
+def request_too_large(e):
+    return jsonify({'error': 'File too large'}), 413
+
+# Buffered JSON responses at least this large are gzipped for clients that accept it;
+# streamed responses (SSE, NDJSON) are left alone so rows are not held back
+GZIP_MIN_BYTES = 1024
+
+@app.after_request
+def gzip_json_response(response):
+    if (response.mimetype != 'application/json' or response.is_streamed
+            or response.direct_passthrough or 'Content-Encoding' in response.headers
+            or 'gzip' not in request.headers.get('Accept-Encoding', '')):
+        return response
+    body = response.get_data()
+    if len(body) < GZIP_MIN_BYTES:
+        return response
+    response.set_data(gzip.compress(body, compresslevel=5))
+    response.headers['Content-Encoding'] = 'gzip'
+    response.vary.add('Accept-Encoding')
+    return response
+
+def _is_pdf_upload(file):
+    """Check the PDF magic bytes without reading the whole upload"""
+    header = file.stream.read(5)
+    file.stream.seek(0)
+    return header == b'%PDF-'
+
+def _upload_stream(file):
+    """Werkzeug already spools uploads to a seekable temp file; rewind it for reading"""
+    file.stream.seek(0)
+    return file.stream
+
 @app.route('/')
 def index():
     return render_template('index.html')
 
 @app.route('/extract', methods=['POST'])
 def extract():
+    if request.content_length and request.content_length > MAX_UPLOAD_BYTES:
+        return jsonify({'error': 'File too large'}), 413
+    
     if 'pdf' not in request.files:
         return jsonify({'error': 'No file uploaded'}), 400
     
@@ -29,83 +82,390 @@ def extract():
     if file.filename == '':
         return jsonify({'error': 'No file selected'}), 400
     
+    if not _is_pdf_upload(file):
+        return jsonify({'error': 'Only PDF files are supported'}), 400
+    
     try:
         # Extract structured data from PDF using Amazon Textract
-        pdf_bytes = file.read()
-        structured_data = extract_structured_data_from_pdf_bytes(pdf_bytes)
+        structured_data = extract_structured_data_from_pdf_stream(_upload_stream(file))
         
         # Return the new JSON format
         return jsonify(structured_data)
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-def summarize_commentary(text):
-    """Summarize long commentary using GPT-4o-mini"""
+@app.route('/extract/start', methods=['POST'])
+def extract_start():
+    """Upload a PDF and start Textract without waiting; poll /extract/status/<job_id> for the result"""
+    if request.content_length and request.content_length > MAX_UPLOAD_BYTES:
+        return jsonify({'error': 'File too large'}), 413
+    
+    if 'pdf' not in request.files:
+        return jsonify({'error': 'No file uploaded'}), 400
+    
+    file = request.files['pdf']
+    if file.filename == '':
+        return jsonify({'error': 'No file selected'}), 400
+    
+    if not _is_pdf_upload(file):
+        return jsonify({'error': 'Only PDF files are supported'}), 400
+    
     try:
-        import openai
-        import os
-        
-        client = openai.OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
-        
-        prompt = f"""Summarize this financial document commentary in 2-3 complete sentences, preserving all key information:
+        job_id = start_structured_data_extraction(_upload_stream(file))
+        return jsonify({'job_id': job_id}), 202
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
 
-{text}
+@app.route('/extract/status/<job_id>')
+def extract_status(job_id):
+    """Report a started extraction, with the same JSON as /extract once it has finished"""
+    try:
+        structured_data = get_structured_data_extraction(job_id)
+        if structured_data is None:
+            return jsonify({'job_id': job_id, 'status': 'IN_PROGRESS'}), 202
+        return jsonify(structured_data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+# Summaries of recently seen paragraphs, keyed by whitespace-normalized text;
+# identical text recurs across documents and repeated runs of the same document
+SUMMARY_CACHE_SIZE = 1024
+_summary_cache = OrderedDict()
+_summary_cache_lock = threading.Lock()
 
-Instructions:
+_SUMMARY_INSTRUCTIONS = """Instructions:
 - Preserve ALL financial figures, percentages, dates, and company names
 - Keep the complete meaning and context
 - Use complete sentences that don't cut off mid-thought
 - Maintain the professional tone and key details"""
 
-        response = client.chat.completions.create(
-            model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
-            max_tokens=150,
-            temperature=0.2
-        )
-        
-        # Calculate and log cost for summarization
-        if hasattr(response, 'usage') and response.usage:
-            input_tokens = response.usage.prompt_tokens
-            output_tokens = response.usage.completion_tokens
-            input_cost = (input_tokens / 1_000_000) * 0.150  # GPT-4o-mini input cost
-            output_cost = (output_tokens / 1_000_000) * 0.600  # GPT-4o-mini output cost
-            total_cost = input_cost + output_cost
-            print(f"Commentary summarization cost: ${total_cost:.6f} ({input_tokens} input + {output_tokens} output tokens)")
+def _log_summary_cost(response):
+    """Calculate and log cost for summarization"""
+    if hasattr(response, 'usage') and response.usage:
+        input_tokens = response.usage.prompt_tokens
+        output_tokens = response.usage.completion_tokens
+        input_cost = (input_tokens / 1_000_000) * 0.150  # GPT-4o-mini input cost
+        output_cost = (output_tokens / 1_000_000) * 0.600  # GPT-4o-mini output cost
+        total_cost = input_cost + output_cost
+        print(f"Commentary summarization cost: ${total_cost:.6f} ({input_tokens} input + {output_tokens} output tokens)")
+
+def _request_summary(text):
+    """Summarize one paragraph with GPT-4o-mini; raises on failure"""
+    import openai
+    
+    client = openai.OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+    
+    prompt = f"""Summarize this financial document commentary in 2-3 complete sentences, preserving all key information:
+
+{text}
+
+{_SUMMARY_INSTRUCTIONS}"""
+
+    response = client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[{"role": "user", "content": prompt}],
+        max_tokens=150,
+        temperature=0.2
+    )
+    _log_summary_cost(response)
+    
+    return response.choices[0].message.content.strip()
+
+def _request_summaries(texts):
+    """Summarize several paragraphs in one GPT-4o-mini call; raises on failure or a malformed reply"""
+    import openai
+    
+    client = openai.OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+    
+    numbered = '\n\n'.join(f"{i}. {text}" for i, text in enumerate(texts, 1))
+    prompt = f"""Summarize each of the following financial document commentary paragraphs in 2-3 complete sentences, preserving all key information.
+Return a JSON object mapping each paragraph number to its summary, e.g. {{"1": "...", "2": "..."}}.
+
+{numbered}
+
+{_SUMMARY_INSTRUCTIONS}"""
+
+    response = client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[{"role": "user", "content": prompt}],
+        max_tokens=150 * len(texts),
+        temperature=0.2,
+        response_format={"type": "json_object"}
+    )
+    _log_summary_cost(response)
+    
+    summaries = json.loads(response.choices[0].message.content)
+    return [summaries[str(i)].strip() for i in range(1, len(texts) + 1)]
+
+# Summaries are also kept in SQLite so they survive restarts and are shared between
+# workers; the in-memory cache above sits in front of it. Set SUMMARY_CACHE_DB to ''
+# to disable
+SUMMARY_CACHE_DB = os.environ.get('SUMMARY_CACHE_DB', os.path.join(tempfile.gettempdir(), 'pdf_summary_cache.sqlite3'))
+_summary_db = None
+_summary_db_lock = threading.Lock()
+
+def _get_summary_db():
+    """Open the summary database on first use; None when disabled or unavailable"""
+    global _summary_db
+    if _summary_db is None:
+        _summary_db = False
+        if SUMMARY_CACHE_DB:
+            try:
+                db = sqlite3.connect(SUMMARY_CACHE_DB, timeout=5, check_same_thread=False)
+                db.execute('CREATE TABLE IF NOT EXISTS summaries (hash TEXT PRIMARY KEY, summary TEXT NOT NULL)')
+                db.commit()
+                _summary_db = db
+            except sqlite3.Error as e:
+                print(f"Summary cache database unavailable: {e}")
+    return _summary_db or None
+
+def _summary_hash(text):
+    return hashlib.sha256(text.encode()).hexdigest()
+
+def _load_stored_summaries(keys):
+    """Look up stored summaries for normalized texts, returning those found"""
+    hashes = {_summary_hash(key): key for key in keys}
+    found = {}
+    with _summary_db_lock:
+        db = _get_summary_db()
+        if db is None:
+            return found
+        try:
+            placeholders = ','.join('?' * len(hashes))
+            for text_hash, summary in db.execute(
+                    f'SELECT hash, summary FROM summaries WHERE hash IN ({placeholders})', list(hashes)):
+                found[hashes[text_hash]] = summary
+        except sqlite3.Error as e:
+            print(f"Error reading summary cache: {e}")
+    return found
+
+def _store_summaries(summaries):
+    """Persist newly generated summaries keyed by normalized text"""
+    with _summary_db_lock:
+        db = _get_summary_db()
+        if db is None:
+            return
+        try:
+            db.executemany('INSERT OR REPLACE INTO summaries (hash, summary) VALUES (?, ?)',
+                           [(_summary_hash(key), summary) for key, summary in summaries.items()])
+            db.commit()
+        except sqlite3.Error as e:
+            print(f"Error writing summary cache: {e}")
+
+# Runs summary requests off the streaming generator's thread
+_SUMMARY_POOL = ThreadPoolExecutor(max_workers=4)
+
+# Set ENABLE_LLM_SUMMARY=0 to shorten commentary locally, e.g. without an API key
+ENABLE_LLM_SUMMARY = os.environ.get("ENABLE_LLM_SUMMARY", "1") == "1"
+SUMMARY_MAX_LENGTH = 400
+
+def _needs_llm_summary(text):
+    """Only paragraphs of more than two sentences are worth an API call; shorter
+    ones are cut at a sentence boundary locally"""
+    return ENABLE_LLM_SUMMARY and text.count('. ') >= 2
+
+def _truncate_commentary(text):
+    """Shorten commentary to its leading complete sentences without calling the API"""
+    return _leading_sentences(text, SUMMARY_MAX_LENGTH) or text[:SUMMARY_MAX_LENGTH] + '...'
+
+def summarize_commentaries(texts):
+    """Summarize long commentary paragraphs using GPT-4o-mini, one request for all uncached ones"""
+    normalized = [' '.join(text.split()) for text in texts]
+    summaries = {}
+    local = {key: _truncate_commentary(key) for key in normalized if not _needs_llm_summary(key)}
+    with _summary_cache_lock:
+        for key in normalized:
+            if key in local:
+                continue
+            if key in _summary_cache:
+                _summary_cache.move_to_end(key)
+                summaries[key] = _summary_cache[key]
+    
+    missing = list(dict.fromkeys(key for key in normalized if key not in summaries and key not in local))
+    if missing:
+        summaries.update(_load_stored_summaries(missing))
+        missing = [key for key in missing if key not in summaries]
+    
+    generated = {}
+    if len(missing) > 1:
+        try:
+            generated.update(zip(missing, _request_summaries(missing)))
+            missing = []
+        except Exception as e:
+            print(f"Error batch summarizing commentary, summarizing individually: {e}")
+    for key in missing:
+        try:
+            generated[key] = _request_summary(key)
+        except Exception as e:
+            print(f"Error summarizing commentary: {e}")
+    if generated:
+        summaries.update(generated)
+        _store_summaries(generated)
+    
+    with _summary_cache_lock:
+        for key, summary in summaries.items():
+            _summary_cache[key] = summary
+            _summary_cache.move_to_end(key)
+        while len(_summary_cache) > SUMMARY_CACHE_SIZE:
+            _summary_cache.popitem(last=False)
+    
+    results = []
+    for text, key in zip(texts, normalized):
+        if key in local:
+            results.append(local[key])
+        elif key in summaries:
+            results.append(summaries[key])
+        else:
+            results.append(text[:200] + '...' if len(text) > 200 else text)
+    return results
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+_NUMERIC_RE = re.compile(r'\d+\.?\d*')
+# Underscores and whitespace separating the words of a field name
+_FIELD_SPLIT_RE = re.compile(r'[_\s]+')
+# Thousands separators inside numbers, so "1,200" in the text matches a value of "1200"
+_DIGIT_GROUP_RE = re.compile(r'(?<=\d),(?=\d{3})')
+
+# A line scoring at least this high is taken as the match without
+# scanning the remaining candidates
+STRONG_MATCH_SCORE = 8
+
+class DocumentIndex:
+    """Per-request view of document_text: lowercased lines, the same lines with
+    thousands separators and footnote markers removed for value matching, and a
+    token -> line index map"""
+    
+    def __init__(self, document_text):
+        self.lines = document_text
+        self.lower_lines = [line.lower() for line in document_text]
+        self.number_lines = [_DIGIT_GROUP_RE.sub('', line_lower) for line_lower in self.lower_lines]
+        # Number lines with footnote markers stripped, as used for value scoring
+        self.clean_lines = [_clean_superscript_numbers(line) for line in self.number_lines]
+        self.commentaries = {}
+        self.postings = {}
+        for i, line_lower in enumerate(self.lower_lines):
+            # Index tokens of both forms so "1,200" is found by "1200" and by "1" / "200"
+            tokens = set(_TOKEN_RE.findall(line_lower))
+            tokens.update(_TOKEN_RE.findall(self.number_lines[i]))
+            # Index whole numbers too, so decimals such as "5.2", whose digit tokens
+            # are too short to query, are found by their numeric parts
+            tokens.update(_NUMERIC_RE.findall(self.number_lines[i]))
+            tokens.update(_NUMERIC_RE.findall(self.clean_lines[i]))
+            for token in tokens:
+                self.postings.setdefault(token, []).append(i)
+    
+    def candidate_lines(self, tokens):
+        """Return sorted indices of lines containing any of the given tokens"""
+        candidates = set()
+        for token in tokens:
+            lines = self.postings.get(token)
+            if lines:
+                candidates.update(lines)
+        return sorted(candidates)
+    
+    def commentary_for_line(self, i):
+        """Cleaned, truncated context around line i; rows matching the same line share it"""
+        commentary = self.commentaries.get(i)
+        if commentary is None:
+            # Get targeted context around the matching line
+            context_lines = self.lines[max(0, i - 1):i + 3]
+            
+            # Join and clean up the context
+            commentary = _clean_superscript_numbers(' '.join(context_lines).strip())
+            
+            # Truncate if too long but keep complete sentences
+            if len(commentary) > 400:
+                commentary = _leading_sentences(commentary, 350) or commentary[:400] + '...'
+            self.commentaries[i] = commentary
+        return commentary
+    
+    def find_line_containing(self, text_lower):
+        """Return the index of the first line containing text_lower, or -1"""
+        # Tokens strictly inside the text are whole tokens of any line containing it,
+        # so intersecting their postings narrows the lines that need a substring check
+        tokens = _TOKEN_RE.findall(text_lower)[1:-1]
+        if tokens:
+            candidates = None
+            for token in set(tokens):
+                lines = self.postings.get(token)
+                if not lines:
+                    return -1
+                candidates = set(lines) if candidates is None else candidates.intersection(lines)
+                if not candidates:
+                    return -1
+            line_indices = sorted(candidates)
+        else:
+            line_indices = range(len(self.lower_lines))
         
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        print(f"Error summarizing commentary: {e}")
-        return text[:200] + '...' if len(text) > 200 else text
+        lower_lines = self.lower_lines
+        for i in line_indices:
+            if text_lower in lower_lines[i]:
+                return i
+        return -1
+
+@lru_cache(maxsize=4096)
+def _field_terms(field):
+    """Matchable words and index tokens for a lowercased field name"""
+    field_words = tuple(word for word in _FIELD_SPLIT_RE.split(field) if len(word) > 2)
+    field_tokens = frozenset(token for token in _TOKEN_RE.findall(' '.join(field_words)) if len(token) > 1)
+    return field_words, field_tokens
+
+# Currency, percent and thousands-separator characters dropped from values before matching
+_VALUE_STRIP = str.maketrans('', '', '$%,')
 
-def find_relevant_document_text(row_data, document_text):
+@lru_cache(maxsize=4096)
+def _value_terms(value):
+    """Cleaned text, scorable numeric parts and index tokens for a lowercased value"""
+    value_clean = value.translate(_VALUE_STRIP).strip()
+    numeric_part = tuple(num for num in _NUMERIC_RE.findall(value_clean) if len(num) > 1)
+    value_tokens = frozenset(token for token in _TOKEN_RE.findall(value_clean) if len(token) > 1)
+    return value_clean, numeric_part, value_tokens
+
+def find_relevant_document_text(row_data, doc_index):
     """Find relevant text from document that mentions this data point"""
     field = row_data.get('field', '').lower()
     value = str(row_data.get('value', '')).lower()
     
-    # Clean field and value for better matching
-    field_words = [word for word in field.replace('_', ' ').split() if len(word) > 2]
-    value_clean = value.replace('$', '').replace('%', '').replace(',', '').strip()
+    # Clean field and value for better matching; many rows share a field, so
+    # the split and tokenisation are cached
+    field_words, field_tokens = _field_terms(field)
+    value_clean, numeric_part, value_tokens = _value_terms(value)
+    
+    # Highest score any line could reach; rows that can never reach a
+    # high-confidence match skip the scan, and a line reaching it ends the scan
+    match_value = len(value_clean) > 2
+    max_possible = (10 if match_value else 0) + 7 * len(numeric_part) + 2 * len(field_words)
+    if max_possible < 7:
+        return ''
+    stop_score = min(STRONG_MATCH_SCORE, max_possible)
     
-    # Extract numeric part if value contains numbers
-    import re
-    numeric_part = re.findall(r'\d+\.?\d*', value_clean)
+    # Tokens used to look up candidate lines in the index. Field words alone
+    # score at most 2 each, so unless there are enough of them to reach the
+    # threshold a line must share a value token or number; common field words
+    # such as "revenue" then stop pulling in every line that mentions them
+    if 2 * len(field_words) >= 7:
+        query_tokens = field_tokens | value_tokens | frozenset(numeric_part)
+    else:
+        query_tokens = value_tokens | frozenset(numeric_part)
     
-    best_matches = []
+    best_score = 0
+    best_line = -1
     
-    # Look for text segments that mention the value or field
-    for i, line in enumerate(document_text):
-        line_lower = line.lower()
-        line_clean = _clean_superscript_numbers(line_lower)
+    # Only score lines sharing a token with the field or value
+    for i in doc_index.candidate_lines(query_tokens):
+        line_lower = doc_index.lower_lines[i]
+        line_clean = doc_index.clean_lines[i]
         score = 0
         
         # High priority: exact value match
-        if value_clean and len(value_clean) > 2 and value_clean in line_clean:
+        if match_value and value_clean in line_clean:
             score += 10
         
         # Medium priority: numeric match
         for num in numeric_part:
-            if len(num) > 1 and num in line_clean:
+            if num in line_clean:
                 score += 7
         
         # Lower priority: field word matches
@@ -113,119 +473,104 @@ def find_relevant_document_text(row_data, document_text):
             if word in line_lower:
                 score += 2
         
-        # If we found a relevant match, store it with context
-        if score >= 7:  # Only include high-confidence matches
-            # Get targeted context around the matching line
-            start_idx = max(0, i - 1)
-            end_idx = min(len(document_text), i + 3)
-            context_lines = document_text[start_idx:end_idx]
+        # Keep the best high-confidence line; context is only built for the winner
+        if score >= 7 and score > best_score:
+            best_score = score
+            best_line = i
             
-            # Join and clean up the context
-            context = ' '.join(context_lines).strip()
-            context = _clean_superscript_numbers(context)
-            
-            best_matches.append({
-                'text': context,
-                'score': score,
-                'line_index': i
-            })
-    
-    # Sort by score and return the best match
-    if best_matches:
-        best_matches.sort(key=lambda x: x['score'], reverse=True)
-        best_context = best_matches[0]['text']
-        
-        # Truncate if too long but keep complete sentences
-        if len(best_context) > 400:
-            sentences = best_context.replace('!', '.').replace('?', '.').split('.')
-            complete_text = ""
-            for sentence in sentences:
-                sentence = sentence.strip()
-                if sentence and len(complete_text + sentence) < 350:
-                    complete_text += sentence + ". "
-                else:
-                    break
-            
-            if complete_text:
-                return complete_text.strip()
-            else:
-                return best_context[:400] + '...'
-        else:
-            return best_context
+            if score >= stop_score:
+                break
+    
+    if best_line >= 0:
+        return doc_index.commentary_for_line(best_line)
     
     return ''  # No relevant matches found
 
+_SENTENCE_END_RE = re.compile(r'[.!?]')
+
+def _leading_sentences(text, limit):
+    """Join complete sentences from the start of text while the total stays under limit"""
+    # Sentences are found one at a time so long texts are not split in full
+    sentences = []
+    length = 0
+    start = 0
+    while True:
+        match = _SENTENCE_END_RE.search(text, start)
+        end = match.start() if match else len(text)
+        sentence = text[start:end].strip()
+        if not sentence or length + len(sentence) >= limit:
+            break
+        sentences.append(sentence)
+        length += len(sentence) + 2
+        if not match:
+            break
+        start = match.end()
+    return '. '.join(sentences) + '.' if sentences else ''
+
+_SUPERSCRIPT_RE = re.compile(r'[⁰¹²³⁴⁵⁶⁷⁸⁹]+')
+# (1), [1] and * style footnote references
+_FOOTNOTE_REF_RE = re.compile(r'\(\d+\)|\[\d+\]|\*+')
+
 def _clean_superscript_numbers(text):
     """Remove superscript numbers from text for better matching"""
-    import re
+    # Most lines are plain ASCII with no markers, so each regex pass only runs
+    # when a cheap membership check says it could match
     
     # Remove superscript numbers (Unicode superscript characters)
-    superscript_pattern = r'[⁰¹²³⁴⁵⁶⁷⁸⁹]+'
-    text = re.sub(superscript_pattern, '', text)
+    if not text.isascii():
+        text = _SUPERSCRIPT_RE.sub('', text)
     
     # Remove common footnote reference patterns
-    footnote_patterns = [
-        r'\(\d+\)',    # (1), (2), etc.
-        r'\[\d+\]',    # [1], [2], etc.
-        r'\*+',        # *, **, ***, etc.
-    ]
-    
-    for pattern in footnote_patterns:
-        text = re.sub(pattern, '', text)
+    if '(' in text or '[' in text or '*' in text:
+        text = _FOOTNOTE_REF_RE.sub('', text)
     
     return ' '.join(text.split())
 
-def get_unmatched_document_text(df_data, document_text):
+def get_unmatched_document_text(df_data, doc_index):
     """Get document text that doesn't match any extracted data"""
-    used_indices = set()
+    document_text = doc_index.lines
+    stripped_lines = [line.strip() for line in document_text]
+    line_count = len(document_text)
+    # 1 for lines that can go into an unmatched paragraph: long enough and not used as commentary
+    keep = bytearray(len(stripped) > 15 for stripped in stripped_lines)
     
-    # Mark lines that were used for commentary (with context)
+    # Mark lines that were used for commentary (with context); rows sharing
+    # commentary need only one lookup
+    seen_samples = set()
     for row in df_data:
         if row.get('commentary'):
             commentary_sample = row['commentary'][:100].lower()
-            for i, line in enumerate(document_text):
-                if commentary_sample in line.lower():
-                    # Mark this line and surrounding context as used
-                    for j in range(max(0, i-1), min(len(document_text), i+2)):
-                        used_indices.add(j)
+            if commentary_sample in seen_samples:
+                continue
+            seen_samples.add(commentary_sample)
+            i = doc_index.find_line_containing(commentary_sample)
+            if i >= 0:
+                # Mark this line and surrounding context as used
+                for j in range(max(0, i-1), min(line_count, i+2)):
+                    keep[j] = 0
     
-    # Collect unused lines in meaningful paragraphs
+    # Collect runs of unused lines as paragraphs, located with C-level scans of the
+    # mask; only the first three substantial paragraphs are ever shown
     unmatched_paragraphs = []
-    current_paragraph = []
-    
-    for i, line in enumerate(document_text):
-        if i not in used_indices and len(line.strip()) > 15:
-            current_paragraph.append(line.strip())
-        else:
-            # End of paragraph - save if substantial
-            if current_paragraph:
-                paragraph_text = ' '.join(current_paragraph)
-                if len(paragraph_text) > 50:  # Only keep substantial paragraphs
-                    unmatched_paragraphs.append(paragraph_text)
-                current_paragraph = []
-    
-    # Don't forget the last paragraph
-    if current_paragraph:
-        paragraph_text = ' '.join(current_paragraph)
-        if len(paragraph_text) > 50:
+    start = keep.find(1)
+    while start >= 0 and len(unmatched_paragraphs) < 3:
+        end = keep.find(0, start)
+        if end < 0:
+            end = line_count
+        paragraph_text = ' '.join(stripped_lines[start:end])
+        if len(paragraph_text) > 50:  # Only keep substantial paragraphs
             unmatched_paragraphs.append(paragraph_text)
+        start = keep.find(1, end)
     
     # Limit and truncate paragraphs for readability with complete sentences
     final_chunks = []
     for paragraph in unmatched_paragraphs[:3]:  # Limit to 3 substantial chunks
         if len(paragraph) > 500:
             # Find complete sentences to avoid cutting off mid-sentence
-            sentences = paragraph.replace('!', '.').replace('?', '.').split('.')
-            complete_paragraph = ""
-            for sentence in sentences:
-                sentence = sentence.strip()
-                if sentence and len(complete_paragraph + sentence) < 450:
-                    complete_paragraph += sentence + ". "
-                else:
-                    break
+            complete_paragraph = _leading_sentences(paragraph, 450)
             
-            if complete_paragraph and len(complete_paragraph) > 50:
-                final_chunks.append(complete_paragraph.strip())
+            if len(complete_paragraph) >= 50:
+                final_chunks.append(complete_paragraph)
             else:
                 # Fallback: truncate at word boundary
                 truncated = paragraph[:450]
@@ -237,6 +582,62 @@ def get_unmatched_document_text(df_data, document_text):
     
     return final_chunks
 
+# Streamed rows are coalesced into one SSE frame per SSE_BATCH_ROWS rows,
+# SSE_BATCH_BYTES of JSON or SSE_BATCH_SECONDS since the first queued row,
+# whichever comes first
+SSE_BATCH_ROWS = 16
+SSE_BATCH_BYTES = 4096
+SSE_BATCH_SECONDS = 0.05
+
+# One shared compact encoder; json.dumps with custom separators builds a new encoder per call
+_encode_json = json.JSONEncoder(separators=(',', ':')).encode
+
+_SSE_PREFIX = b'data: '
+_SSE_SUFFIX = b'\n\n'
+
+# Response headers shared by every SSE endpoint
+SSE_HEADERS = {
+    'Cache-Control': 'no-cache',
+    'Connection': 'keep-alive',
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Cache-Control',
+    'X-Accel-Buffering': 'no'
+}
+
+def _sse_event(payload):
+    """Format a payload as a compact, pre-encoded SSE data frame"""
+    return _SSE_PREFIX + _encode_json(payload).encode() + _SSE_SUFFIX
+
+class SSERowBatch:
+    """Buffer streamed rows and emit them together as one SSE frame of the given type"""
+    
+    def __init__(self, frame_type):
+        self.frame_head = _SSE_PREFIX + b'{"type":"' + frame_type.encode() + b'","rows":['
+        self.rows = []
+        self.size = 0
+        self.started = 0.0
+    
+    def add(self, row):
+        """Queue a row; return a frame when the batch is full or has waited long enough, otherwise None"""
+        encoded = _encode_json(row).encode()
+        if not self.rows:
+            self.started = time.monotonic()
+        self.rows.append(encoded)
+        self.size += len(encoded)
+        if (len(self.rows) >= SSE_BATCH_ROWS or self.size >= SSE_BATCH_BYTES
+                or time.monotonic() - self.started >= SSE_BATCH_SECONDS):
+            return self.flush()
+        return None
+    
+    def flush(self):
+        """Return a frame with all queued rows, or None if nothing is queued"""
+        if not self.rows:
+            return None
+        frame = self.frame_head + b','.join(self.rows) + b']}' + _SSE_SUFFIX
+        self.rows = []
+        self.size = 0
+        return frame
+
 @app.route('/process_stream', methods=['POST'])
 def process_stream():
     """Streaming endpoint for progressive data processing"""
@@ -246,24 +647,41 @@ def process_stream():
     
     def generate():
         try:
-            import pandas as pd
-            
-            # Process the structured JSON data 
-            result = process_structured_data_with_llm(data)
+            # Process the structured JSON data; commentary comes from the document
+            # index below, so the LLM commentary matching phase is skipped
+            result = cached_process_structured_data_with_llm(data, match_commentary=False)
             
             # Initialize data collection
             df_data = []
+            append = df_data.append
+            row_batch = SSERowBatch('batch')
+            add_row = row_batch.add
+            
+            # Index the document text up front so each row carries its commentary when first sent
+            document_text = data.get('document_text', [])
+            doc_index = DocumentIndex(document_text) if document_text else None
+            commentary_cache = {}
+            
+            def match_commentary(row):
+                # Rows sharing a field and value get the same match, so score each pair once
+                key = (row['field'], row['value'])
+                if key not in commentary_cache:
+                    commentary_cache[key] = find_relevant_document_text(row, doc_index)
+                relevant_text = commentary_cache[key]
+                if relevant_text:
+                    row['commentary'] = relevant_text
             
             # Process tables - restore simple format and add commentary
             if 'processed_tables' in result and result['processed_tables']:
                 for i, table in enumerate(result['processed_tables']):
-                    if table.get('structured_table') and not table['structured_table'].get('error'):
-                        table_data = table['structured_table']
+                    table_data = table.get('structured_table')
+                    if table_data and not table_data.get('error'):
+                        table_data.pop('error', None)
                         page = table.get('page', 'N/A')
                         
                         # Stream each table data row as it's processed
                         for key, value in table_data.items():
-                            if key != 'error' and value:
+                            if value:
                                 row_data = {
                                     'source': f'Table {i+1}',
                                     'type': 'Table Data',
@@ -272,16 +690,21 @@ def process_stream():
                                     'page': page,
                                     'commentary': ''  # Will be filled from document text only
                                 }
-                                df_data.append(row_data)
-                                # Stream this row immediately
-                                yield f"data: {json.dumps({'type': 'row', 'data': row_data})}\n\n"
+                                if doc_index:
+                                    match_commentary(row_data)
+                                append(row_data)
+                                # Queue this row for streaming
+                                frame = add_row(row_data)
+                                if frame:
+                                    yield frame
             
             # Process key-value pairs
             if 'processed_key_values' in result and result['processed_key_values']:
                 kv_data = result['processed_key_values'].get('structured_key_values', {})
                 if kv_data and not kv_data.get('error'):
+                    kv_data.pop('error', None)
                     for key, value in kv_data.items():
-                        if key != 'error' and value:
+                        if value:
                             row_data = {
                                 'source': 'Key-Value Pairs',
                                 'type': 'Structured Data',
@@ -290,17 +713,22 @@ def process_stream():
                                 'page': 'N/A',
                                 'commentary': ''  # Will be filled from document text only
                             }
-                            df_data.append(row_data)
-                            # Stream this row immediately
-                            yield f"data: {json.dumps({'type': 'row', 'data': row_data})}\n\n"
+                            if doc_index:
+                                match_commentary(row_data)
+                            append(row_data)
+                            # Queue this row for streaming
+                            frame = add_row(row_data)
+                            if frame:
+                                yield frame
             
             # Process document text facts including footnotes
             if 'processed_document_text' in result and result['processed_document_text']:
                 for chunk_idx, chunk in enumerate(result['processed_document_text']):
-                    if 'extracted_facts' in chunk and not chunk['extracted_facts'].get('error'):
-                        facts = chunk['extracted_facts']
+                    facts = chunk.get('extracted_facts')
+                    if facts and not facts.get('error'):
+                        facts.pop('error', None)
                         for key, value in facts.items():
-                            if key != 'error' and value:
+                            if value:
                                 # Determine if this is footnote content
                                 data_type = 'Footnote' if 'footnote' in key.lower() else 'Financial Data'
                                 field_name = key.replace('_Footnote', ' (Footnote)').replace('Footnote_', 'Footnote: ')
@@ -313,9 +741,13 @@ def process_stream():
                                     'page': 'N/A',
                                     'commentary': ''  # Will be filled from document text only
                                 }
-                                df_data.append(row_data)
-                                # Stream this row immediately
-                                yield f"data: {json.dumps({'type': 'row', 'data': row_data})}\n\n"
+                                if doc_index:
+                                    match_commentary(row_data)
+                                append(row_data)
+                                # Queue this row for streaming
+                                frame = add_row(row_data)
+                                if frame:
+                                    yield frame
             
             # Process standalone footnotes if available
             if 'footnotes' in data and data['footnotes']:
@@ -328,29 +760,30 @@ def process_stream():
                         'page': 'N/A',
                         'commentary': f"Line {footnote.get('line_number', 'N/A')}"
                     }
-                    df_data.append(row_data)
-                    yield f"data: {json.dumps({'type': 'row', 'data': row_data})}\n\n"
-            
-            # Now add commentary from document text only (no AI-generated comments)
-            document_text = data.get('document_text', [])
-            if document_text and df_data:
-                for row in df_data:
-                    # Find relevant text from document that mentions this data point
-                    relevant_text = find_relevant_document_text(row, document_text)
-                    if relevant_text:
-                        row['commentary'] = relevant_text
-                        # Stream updated row with commentary
-                        yield f"data: {json.dumps({'type': 'row_update', 'data': row})}\n\n"
+                    if doc_index:
+                        match_commentary(row_data)
+                    append(row_data)
+                    frame = add_row(row_data)
+                    if frame:
+                        yield frame
             
             # Add general unmatched document text as separate entries
             if document_text:
-                unmatched_text = get_unmatched_document_text(df_data, document_text)
+                unmatched_text = get_unmatched_document_text(df_data, doc_index)
                 if unmatched_text:
+                    # Summarize chunks that are too long, all in one request on a worker
+                    # thread, and send the rows buffered so far while it runs
+                    long_chunks = [text_chunk for text_chunk in unmatched_text if len(text_chunk) > 400]
+                    summary_future = _SUMMARY_POOL.submit(summarize_commentaries, long_chunks) if long_chunks else None
+                    
+                    frame = row_batch.flush()
+                    if frame:
+                        yield frame
+                    
+                    summaries = dict(zip(long_chunks, summary_future.result())) if summary_future else {}
+                    
                     for idx, text_chunk in enumerate(unmatched_text):
-                        # Summarize if text is too long
-                        display_text = text_chunk
-                        if len(text_chunk) > 400:
-                            display_text = summarize_commentary(text_chunk)
+                        display_text = summaries.get(text_chunk, text_chunk)
                         
                         row_data = {
                             'source': 'Document Text',
@@ -360,8 +793,10 @@ def process_stream():
                             'page': 'N/A',
                             'commentary': 'Unmatched document content'
                         }
-                        df_data.append(row_data)
-                        yield f"data: {json.dumps({'type': 'row', 'data': row_data})}\n\n"
+                        append(row_data)
+                        frame = add_row(row_data)
+                        if frame:
+                            yield frame
             
             # Add cost summary if available
             cost_summary = result.get('cost_summary', {})
@@ -374,30 +809,136 @@ def process_stream():
                     'page': 'N/A',
                     'commentary': f"Tokens: {cost_summary.get('total_tokens', 0):,} | API Calls: {cost_summary.get('api_calls', 0)}"
                 }
-                df_data.append(cost_data)
-                yield f"data: {json.dumps({'type': 'row', 'data': cost_data})}\n\n"
+                append(cost_data)
+                frame = add_row(cost_data)
+                if frame:
+                    yield frame
+            
+            frame = row_batch.flush()
+            if frame:
+                yield frame
             
             # Send completion signal
-            yield f"data: {json.dumps({'type': 'complete', 'total_rows': len(df_data), 'cost_summary': cost_summary})}\n\n"
+            yield _sse_event({'type': 'complete', 'total_rows': len(df_data), 'cost_summary': cost_summary})
             
         except Exception as e:
-            yield f"data: {json.dumps({'status': 'error', 'error': str(e)})}\n\n"
-    
-    return Response(generate(), mimetype='text/event-stream', headers={
-        'Cache-Control': 'no-cache',
-        'Connection': 'keep-alive',
-        'Access-Control-Allow-Origin': '*',
-        'Access-Control-Allow-Headers': 'Cache-Control',
-        'X-Accel-Buffering': 'no'
-    })
+            yield _sse_event({'status': 'error', 'error': str(e)})
     
-    return Response(generate(), mimetype='text/event-stream', headers={
-        'Cache-Control': 'no-cache',
-        'Connection': 'keep-alive',
-        'Access-Control-Allow-Origin': '*',
-        'Access-Control-Allow-Headers': 'Cache-Control',
-        'X-Accel-Buffering': 'no'
-    })
+    # Frames are already bytes, so Werkzeug can hand them to the server without re-encoding
+    return Response(generate(), mimetype='text/event-stream', headers=SSE_HEADERS, direct_passthrough=True)
+
+def _clean_value(value):
+    """Stringify a row value, returning '' for empty and 'nan' values"""
+    value_text = str(value) if value else ''
+    if not value_text.strip() or value_text == 'nan':
+        return ''
+    return value_text
+
+def _iter_fallback_rows(result):
+    """Yield /process rows built straight from the processed tables, key-value pairs and
+    document text, skipping empty values as they are built"""
+    # Process tables
+    if 'processed_tables' in result and result['processed_tables']:
+        for i, table in enumerate(result['processed_tables']):
+            table_data = table.get('structured_table')
+            if table_data and not table_data.get('error'):
+                page = table.get('page', 'N/A')
+                    
+                # Handle different table structures
+                if isinstance(table_data, dict):
+                    table_data.pop('error', None)
+                    for key, value in table_data.items():
+                        value_text = _clean_value(value)
+                        if not value_text:
+                            continue
+                        yield {
+                            'source': f'Table {i+1}',
+                            'type': 'Table Data',
+                            'field': key,
+                            'value': value_text,
+                            'page': page,
+                            'commentary': '',
+                            'has_commentary': False
+                        }
+        
+    # Process key-value pairs
+    if 'processed_key_values' in result and result['processed_key_values']:
+        kv_data = result['processed_key_values'].get('structured_key_values', {})
+        if kv_data and not kv_data.get('error'):
+            kv_data.pop('error', None)
+            for key, value in kv_data.items():
+                value_text = _clean_value(value)
+                if not value_text:
+                    continue
+                yield {
+                    'source': 'Key-Value Pairs',
+                    'type': 'Structured Data',
+                    'field': key,
+                    'value': value_text,
+                    'page': 'N/A',
+                    'commentary': '',
+                    'has_commentary': False
+                }
+        
+    # Process document text with tabulation
+    if 'processed_document_text' in result and result['processed_document_text']:
+        for chunk_idx, chunk in enumerate(result['processed_document_text']):
+            # Handle tabulated document text structure
+            if 'table_headers' in chunk and 'table_rows' in chunk:
+                headers = chunk['table_headers']
+                rows = chunk['table_rows']
+                    
+                # Add document text table structure
+                header_text = _clean_value(' | '.join(headers))
+                if header_text:
+                    yield {
+                        'source': f'Document Text {chunk_idx+1}',
+                        'type': 'Document Table',
+                        'field': 'Headers',
+                        'value': header_text,
+                        'page': 'N/A',
+                        'commentary': 'Tabulated document content',
+                        'has_commentary': True,
+                        'is_table_header': True,
+                        'table_id': f'doc_{chunk_idx}',
+                        'headers': headers,
+                        'rows': rows
+                    }
+                    
+                # Add individual data points from document table
+                for row_idx, row in enumerate(rows):
+                    for col_idx, cell_value in enumerate(row):
+                        if col_idx >= len(headers):
+                            continue
+                        value_text = _clean_value(cell_value)
+                        if value_text:
+                            yield {
+                                'source': f'Document Text {chunk_idx+1}',
+                                'type': 'Document Data',
+                                'field': f'{headers[col_idx]}_Row_{row_idx+1}',
+                                'value': value_text,
+                                'page': 'N/A',
+                                'commentary': '',
+                                'has_commentary': False,
+                                'table_id': f'doc_{chunk_idx}'
+                            }
+                
+            # Also handle extracted facts if available
+            facts = chunk.get('extracted_facts')
+            if facts and not facts.get('error'):
+                facts.pop('error', None)
+                for key, value in facts.items():
+                    value_text = _clean_value(value)
+                    if value_text:
+                        yield {
+                            'source': f'Text Chunk {chunk_idx+1}',
+                            'type': 'Financial Data',
+                            'field': key,
+                            'value': value_text,
+                            'page': 'N/A',
+                            'commentary': '',
+                            'has_commentary': False
+                        }
 
 @app.route('/process', methods=['POST'])
 def process():
@@ -406,14 +947,13 @@ def process():
         return jsonify({'error': 'No data provided'}), 400
     
     try:
-        import pandas as pd
-        
         # Process the structured JSON data with separate LLM calls and commentary matching
-        result = process_structured_data_with_llm(data)
+        result = cached_process_structured_data_with_llm(data)
         
         # Use the enhanced data with commentary if available
         if 'enhanced_data_with_commentary' in result and result['enhanced_data_with_commentary']:
-            clean_data = result['enhanced_data_with_commentary']
+            # Copied so the general commentary row is not appended to the cached result
+            clean_data = list(result['enhanced_data_with_commentary'])
             
             # Add general commentary as a separate row if it exists
             if result.get('general_commentary'):
@@ -428,107 +968,7 @@ def process():
                 })
         else:
             # Fallback to original processing if enhanced data is not available
-            df_data = []
-            
-            # Process tables
-            if 'processed_tables' in result and result['processed_tables']:
-                for i, table in enumerate(result['processed_tables']):
-                    if table.get('structured_table') and not table['structured_table'].get('error'):
-                        table_data = table['structured_table']
-                        page = table.get('page', 'N/A')
-                        
-                        # Handle different table structures
-                        if isinstance(table_data, dict):
-                            for key, value in table_data.items():
-                                if key != 'error':
-                                    df_data.append({
-                                        'source': f'Table {i+1}',
-                                        'type': 'Table Data',
-                                        'field': key,
-                                        'value': str(value) if value else '',
-                                        'page': page,
-                                        'commentary': '',
-                                        'has_commentary': False
-                                    })
-            
-            # Process key-value pairs
-            if 'processed_key_values' in result and result['processed_key_values']:
-                kv_data = result['processed_key_values'].get('structured_key_values', {})
-                if kv_data and not kv_data.get('error'):
-                    for key, value in kv_data.items():
-                        if key != 'error':
-                            df_data.append({
-                                'source': 'Key-Value Pairs',
-                                'type': 'Structured Data',
-                                'field': key,
-                                'value': str(value) if value else '',
-                                'page': 'N/A',
-                                'commentary': '',
-                                'has_commentary': False
-                            })
-            
-            # Process document text with tabulation
-            if 'processed_document_text' in result and result['processed_document_text']:
-                for chunk_idx, chunk in enumerate(result['processed_document_text']):
-                    # Handle tabulated document text structure
-                    if 'table_headers' in chunk and 'table_rows' in chunk:
-                        headers = chunk['table_headers']
-                        rows = chunk['table_rows']
-                        
-                        # Add document text table structure
-                        df_data.append({
-                            'source': f'Document Text {chunk_idx+1}',
-                            'type': 'Document Table',
-                            'field': 'Headers',
-                            'value': ' | '.join(headers),
-                            'page': 'N/A',
-                            'commentary': 'Tabulated document content',
-                            'has_commentary': True,
-                            'is_table_header': True,
-                            'table_id': f'doc_{chunk_idx}',
-                            'headers': headers,
-                            'rows': rows
-                        })
-                        
-                        # Add individual data points from document table
-                        for row_idx, row in enumerate(rows):
-                            for col_idx, cell_value in enumerate(row):
-                                if col_idx < len(headers) and cell_value:
-                                    df_data.append({
-                                        'source': f'Document Text {chunk_idx+1}',
-                                        'type': 'Document Data',
-                                        'field': f'{headers[col_idx]}_Row_{row_idx+1}',
-                                        'value': str(cell_value),
-                                        'page': 'N/A',
-                                        'commentary': '',
-                                        'has_commentary': False,
-                                        'table_id': f'doc_{chunk_idx}'
-                                    })
-                    
-                    # Also handle extracted facts if available
-                    if 'extracted_facts' in chunk and not chunk['extracted_facts'].get('error'):
-                        facts = chunk['extracted_facts']
-                        for key, value in facts.items():
-                            if key != 'error' and value:
-                                df_data.append({
-                                    'source': f'Text Chunk {chunk_idx+1}',
-                                    'type': 'Financial Data',
-                                    'field': key,
-                                    'value': str(value),
-                                    'page': 'N/A',
-                                    'commentary': '',
-                                    'has_commentary': False
-                                })
-            
-            # Clean and prepare data
-            if df_data:
-                # Filter out empty values directly from the list
-                clean_data = [
-                    item for item in df_data 
-                    if item.get('value', '').strip() and item.get('value') != 'nan'
-                ]
-            else:
-                clean_data = []
+            clean_data = list(_iter_fallback_rows(result))
         
         # Return both original result and clean DataFrame data
         response = {
@@ -544,6 +984,9 @@ def process():
 @app.route('/extract_structured', methods=['POST'])
 def extract_structured():
     """Extract structured data from PDF using Amazon Textract"""
+    if request.content_length and request.content_length > MAX_UPLOAD_BYTES:
+        return jsonify({'error': 'File too large'}), 413
+    
     if 'file' not in request.files:
         return jsonify({'error': 'No file uploaded'}), 400
     
@@ -554,10 +997,12 @@ def extract_structured():
     if not file.filename or not file.filename.lower().endswith('.pdf'):
         return jsonify({'error': 'Only PDF files are supported'}), 400
     
+    if not _is_pdf_upload(file):
+        return jsonify({'error': 'Only PDF files are supported'}), 400
+    
     try:
         # Extract structured data using Textract
-        pdf_bytes = file.read()
-        structured_data = extract_structured_data_from_pdf_bytes(pdf_bytes)
+        structured_data = extract_structured_data_from_pdf_stream(_upload_stream(file))
         
         return jsonify({
             'success': True,
@@ -567,6 +1012,43 @@ def extract_structured():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Shared across requests so concurrent batches stay within Textract's rate limits
+EXTRACT_BATCH_WORKERS = 8
+_EXTRACT_POOL = ThreadPoolExecutor(max_workers=EXTRACT_BATCH_WORKERS)
+
+@app.route('/extract_batch', methods=['POST'])
+def extract_batch():
+    """Extract structured data from several PDFs concurrently using Amazon Textract"""
+    if request.content_length and request.content_length > MAX_UPLOAD_BYTES:
+        return jsonify({'error': 'File too large'}), 413
+    
+    files = [file for file in request.files.getlist('pdfs') if file.filename]
+    if not files:
+        return jsonify({'error': 'No files uploaded'}), 400
+    
+    # Start every valid upload before waiting on any, keeping results in request order
+    jobs = []
+    for file in files:
+        if not file.filename.lower().endswith('.pdf') or not _is_pdf_upload(file):
+            jobs.append((file.filename, None))
+        else:
+            jobs.append((file.filename, _EXTRACT_POOL.submit(extract_structured_data_from_pdf_stream, _upload_stream(file))))
+    
+    results = []
+    for filename, future in jobs:
+        if future is None:
+            results.append({'filename': filename, 'error': 'Only PDF files are supported'})
+            continue
+        try:
+            results.append({'filename': filename, 'structured_data': future.result()})
+        except Exception as e:
+            results.append({'filename': filename, 'error': str(e)})
+    
+    return jsonify({
+        'success': True,
+        'results': results
+    })
+
 @app.route('/export/pdf', methods=['POST'])
 def export_pdf():
     data = request.json
@@ -574,15 +1056,17 @@ def export_pdf():
         return jsonify({'error': 'No data provided'}), 400
     
     try:
-        import pandas as pd
-        df = pd.DataFrame(data['data'])
-        pdf_bytes = export_to_pdf(df)
+        pdf_bytes = export_to_pdf(data['data'])
         
-        return jsonify({
-            'pdf': base64.b64encode(pdf_bytes).decode('utf-8')
-        })
+        return send_file(
+            BytesIO(pdf_bytes),
+            mimetype='application/pdf',
+            as_attachment=True,
+            download_name='extracted_data.pdf'
+        )
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
+    # Debug mode (reloader and interactive debugger) is opt-in via FLASK_DEBUG=1
+    app.run(host='0.0.0.0', port=5000, debug=os.environ.get('FLASK_DEBUG') == '1')
\ No newline at end of file
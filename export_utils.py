@@ -1,18 +1,17 @@
 import json
 import base64
-import pandas as pd
 from io import BytesIO
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph
 from reportlab.lib.styles import getSampleStyleSheet
 
-def export_to_pdf(df):
+def export_to_pdf(rows):
     """
-    Export a DataFrame to PDF format.
+    Export rows of extracted data to PDF format.
     
     Args:
-        df (pandas.DataFrame): DataFrame to export
+        rows (list): List of dicts mapping column names to cell values
         
     Returns:
         bytes: PDF content as bytes
@@ -33,7 +32,7 @@ def export_to_pdf(df):
     # Handle the new table format where column names might vary
     # First, get all unique column names across all rows
     all_columns = set()
-    for _, row in df.iterrows():
+    for row in rows:
         all_columns.update(row.keys())
     
     # Ensure "Category" is the first column
@@ -41,16 +40,8 @@ def export_to_pdf(df):
     value_columns = sorted([col for col in all_columns if col != "Category" and col.startswith("Value")])
     column_order.extend(value_columns)
     
-    # Create a new DataFrame with the ordered columns
-    ordered_df = pd.DataFrame(columns=column_order)
-    for idx, row in df.iterrows():
-        ordered_row = {}
-        for col in column_order:
-            ordered_row[col] = row.get(col, "") if col in row else ""
-        ordered_df.loc[idx] = ordered_row
-    
-    # Convert DataFrame to list for table
-    data = [ordered_df.columns.tolist()] + ordered_df.values.tolist()
+    # Build the table data in column order, blank where a row lacks a column
+    data = [column_order] + [[row.get(col, "") for col in column_order] for row in rows]
     
     # Create the table with column widths
     col_widths = [120]  # Width for Category column
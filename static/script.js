@@ -282,9 +282,12 @@ document.addEventListener('DOMContentLoaded', function() {
             // Add new row to streaming results
             streamedRows.push(data.data);
             displayStreamingRow(data.data);
-        } else if (data.type === 'row_update') {
-            // Update existing row with commentary
-            updateStreamingRow(data.data);
+        } else if (data.type === 'batch') {
+            // Several rows coalesced into one frame
+            data.rows.forEach(row => {
+                streamedRows.push(row);
+                displayStreamingRow(row);
+            });
         } else if (data.type === 'complete') {
             hideLoading();
             console.log('Streaming complete. Total rows:', data.total_rows);
@@ -322,28 +325,6 @@ document.addEventListener('DOMContentLoaded', function() {
         tableBody.appendChild(tr);
     }
 
-    function updateStreamingRow(rowData) {
-        const rowIndex = streamedRows.findIndex(row => 
-            row.field === rowData.field && row.source === rowData.source
-        );
-        
-        if (rowIndex >= 0) {
-            streamedRows[rowIndex] = rowData;
-            const tr = document.getElementById(`row-${rowIndex}`);
-            if (tr) {
-                const commentaryCell = tr.querySelector('.commentary-cell');
-                if (commentaryCell) {
-                    commentaryCell.innerHTML = rowData.commentary ? 
-                        `<span class="text-muted small">${rowData.commentary}</span>` : 
-                        '<span class="text-muted">-</span>';
-                }
-                if (rowData.commentary) {
-                    tr.classList.add('has-commentary');
-                }
-            }
-        }
-    }
-
     function initializeStreamingTable() {
         hideLoading();
         resultsSection.innerHTML = `
@@ -1286,22 +1267,20 @@ document.addEventListener('DOMContentLoaded', function() {
                     throw new Error(data.error || 'Failed to generate PDF');
                 });
             }
-            return response.json();
+            return response.blob();
         })
-        .then(data => {
+        .then(blob => {
             hideLoading();
             
-            if (data.pdf) {
-                // Create and click download link
-                const link = document.createElement('a');
-                link.href = `data:application/pdf;base64,${data.pdf}`;
-                link.download = 'extracted_data.pdf';
-                document.body.appendChild(link);
-                link.click();
-                document.body.removeChild(link);
-            } else {
-                throw new Error('No PDF data received from server');
-            }
+            // Create and click download link for the raw PDF bytes
+            const url = URL.createObjectURL(blob);
+            const link = document.createElement('a');
+            link.href = url;
+            link.download = 'extracted_data.pdf';
+            document.body.appendChild(link);
+            link.click();
+            document.body.removeChild(link);
+            URL.revokeObjectURL(url);
         })
         .catch(error => {
             hideLoading();
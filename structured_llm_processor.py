@@ -1,5 +1,9 @@
 import json
 import os
+import re
+import hashlib
+import threading
+from collections import OrderedDict
 from openai import OpenAI
 from typing import Dict, Any, List
 import asyncio
@@ -14,6 +18,19 @@ openai_client = OpenAI(api_key=OPENAI_API_KEY)
 GPT_4O_MINI_INPUT_COST = 0.150  # $0.150 per 1M input tokens
 GPT_4O_MINI_OUTPUT_COST = 0.600  # $0.600 per 1M output tokens
 
+# Documents whose tables, key-values and text fit in ~6000 tokens are sent
+# as one combined request instead of one request per section
+BATCH_PAYLOAD_CHAR_LIMIT = 24000
+
+# Currency symbols, thousands separators and whitespace ignored when comparing values
+_NUM_CLEAN_RE = re.compile(r'[\$,\s]')
+
+# Recent results keyed by a hash of the input data, stored as JSON so every
+# hit returns an independent copy
+RESULT_CACHE_SIZE = 128
+_result_cache = OrderedDict()
+_result_cache_lock = threading.Lock()
+
 class CostTracker:
     def __init__(self):
         self.total_input_tokens = 0
@@ -291,28 +308,123 @@ Be very strict - only return commentary that clearly and directly relates to the
         print(f"Error matching commentary: {e}")
         return {"commentary": None, "relevant": False}
 
-async def process_structured_data_with_llm_async(structured_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Process all sections of structured data with asynchronous LLM calls"""
+async def process_all_sections_batched(tables: List[Dict[str, Any]], key_values: List[Dict[str, Any]],
+                                      document_text: List[str]) -> Dict[str, Any]:
+    """Process tables, key-values and document text of a small document in one LLM call.
     
-    document_text = structured_data.get('document_text', [])
-    tables = structured_data.get('tables', [])
-    key_values = structured_data.get('key_values', [])
+    Returns None when the combined response cannot be used, so the caller can
+    fall back to per-section processing.
+    """
+    text_content = '\n'.join(document_text)
     
-    results = {
-        "processed_tables": [],
-        "processed_key_values": {},
-        "processed_document_text": [],
-        "enhanced_data_with_commentary": [],
-        "general_commentary": "",
-        "summary": {
-            "total_tables": len(tables),
-            "total_key_values": len(key_values),
-            "total_text_lines": len(document_text),
-            "text_chunks_processed": 0,
-            "commentary_matches": 0
+    prompt = f"""You are a financial document analyst. Extract the key data from every section of this document.
+
+Tables (each with page number and rows):
+{json.dumps(tables, indent=2)}
+
+Key-Value pairs:
+{json.dumps(key_values, indent=2)}
+
+Document text:
+{text_content}
+
+Instructions:
+1. For EACH table, in the same order as given, extract important data points as simple field-value pairs
+2. Organize the key-value pairs into clear field-value pairs (no nested structures or arrays)
+3. Tabulate ALL meaningful data from the document text and also list the individual facts
+4. Focus on financial figures, dates, percentages, company info and key metrics
+5. IGNORE superscript numbers and footnote reference markers (¹²³ or (1)(2)(3) or [1][2][3])
+
+Return JSON with exactly this structure:
+{{
+  "tables": [
+    {{"Revenue": "value", "Growth_Rate": "value"}}
+  ],
+  "key_values": {{"Company_Name": "value"}},
+  "document_text": {{
+    "table_headers": ["Metric", "Value", "Period", "Context"],
+    "table_rows": [["Revenue", "$115.5M", "Q4 2023", "33% growth"]],
+    "extracted_facts": {{"Q4_Revenue": "$115.5 million"}}
+  }}
+}}
+
+The "tables" list must contain one object per input table. Return the response as valid JSON format."""
+
+    try:
+        loop = asyncio.get_event_loop()
+        response = await loop.run_in_executor(
+            None,
+            lambda: openai_client.chat.completions.create(
+                model="gpt-4o-mini",
+                messages=[{"role": "user", "content": prompt}],
+                response_format={"type": "json_object"}
+            )
+        )
+        
+        # Track usage and cost
+        if hasattr(response, 'usage') and response.usage:
+            call_cost = cost_tracker.add_usage(
+                response.usage.prompt_tokens,
+                response.usage.completion_tokens
+            )
+            print(f"Batched section processing cost: ${call_cost:.6f}")
+        
+        content = response.choices[0].message.content
+        if not content:
+            return None
+        result = json.loads(content)
+        
+        table_results = result.get("tables") or []
+        if len(table_results) != len(tables):
+            print(f"Batched response returned {len(table_results)} tables, expected {len(tables)}")
+            return None
+        
+        processed_tables = [
+            {
+                "page": table.get("page", 1),
+                "structured_table": table_result if isinstance(table_result, dict) else {"error": "Invalid table result"},
+                "original_rows": table.get("rows", [])
+            }
+            for table, table_result in zip(tables, table_results)
+        ]
+        
+        processed_key_values = {}
+        if key_values:
+            kv_result = result.get("key_values") or {}
+            if not isinstance(kv_result, dict):
+                print("Batched response returned key_values that are not an object")
+                return None
+            processed_key_values = {
+                "structured_key_values": kv_result,
+                "original_pairs": key_values
+            }
+        
+        processed_document_text = []
+        if document_text:
+            text_result = result.get("document_text") or {}
+            extracted_facts = text_result.get("extracted_facts", {}) if isinstance(text_result, dict) else None
+            if not isinstance(extracted_facts, dict):
+                print("Batched response returned document_text facts that are not an object")
+                return None
+            processed_document_text.append({
+                "table_headers": text_result.get("table_headers", []),
+                "table_rows": text_result.get("table_rows", []),
+                "extracted_facts": extracted_facts,
+                "original_text": document_text
+            })
+        
+        return {
+            "processed_tables": processed_tables,
+            "processed_key_values": processed_key_values,
+            "processed_document_text": processed_document_text
         }
-    }
-    
+    except Exception as e:
+        print(f"Error in batched section processing, falling back to per-section calls: {e}")
+        return None
+
+async def process_sections_concurrently(results: Dict[str, Any], document_text: List[str],
+                                        tables: List[Dict[str, Any]], key_values: List[Dict[str, Any]]) -> None:
+    """Process each table, the key-values and each text chunk with its own concurrent LLM call"""
     # Create tasks for asynchronous processing
     tasks = []
     
@@ -373,10 +485,54 @@ async def process_structured_data_with_llm_async(structured_data: Dict[str, Any]
                     result = {"error": str(result)}
                 results["processed_document_text"].append(result)
                 task_index += 1
+
+async def process_structured_data_with_llm_async(structured_data: Dict[str, Any],
+                                                  match_commentary: bool = True) -> Dict[str, Any]:
+    """Process all sections of structured data with asynchronous LLM calls.
+    The sequential commentary matching phase is skipped when match_commentary is False."""
+    
+    document_text = structured_data.get('document_text', [])
+    tables = structured_data.get('tables', [])
+    key_values = structured_data.get('key_values', [])
+    
+    results = {
+        "processed_tables": [],
+        "processed_key_values": {},
+        "processed_document_text": [],
+        "enhanced_data_with_commentary": [],
+        "general_commentary": "",
+        "summary": {
+            "total_tables": len(tables),
+            "total_key_values": len(key_values),
+            "total_text_lines": len(document_text),
+            "text_chunks_processed": 0,
+            "commentary_matches": 0
+        }
+    }
+    
+    # Small documents: one combined call, otherwise fan out per section
+    batched = None
+    sections_size = len(json.dumps({
+        "document_text": document_text,
+        "tables": tables,
+        "key_values": key_values
+    }))
+    if (document_text or tables or key_values) and sections_size <= BATCH_PAYLOAD_CHAR_LIMIT:
+        print(f"Processing all sections in a single LLM call ({sections_size} chars)...")
+        batched = await process_all_sections_batched(tables, key_values, document_text)
+    
+    if batched:
+        results["processed_tables"] = batched["processed_tables"]
+        results["processed_key_values"] = batched["processed_key_values"]
+        results["processed_document_text"] = batched["processed_document_text"]
+        results["summary"]["text_chunks_processed"] = len(batched["processed_document_text"])
+    else:
+        await process_sections_concurrently(results, document_text, tables, key_values)
     
     # Phase 2: Enhanced data processing with commentary matching
-    print("Starting commentary matching phase...")
-    await process_commentary_matching(results, document_text)
+    if match_commentary:
+        print("Starting commentary matching phase...")
+        await process_commentary_matching(results, document_text)
     
     return results
 
@@ -390,12 +546,13 @@ async def process_commentary_matching(results: Dict[str, Any], document_text: Li
     
     # From tables
     for table_result in results.get("processed_tables", []):
-        if "structured_table" in table_result and not table_result["structured_table"].get("error"):
-            structured_table = table_result["structured_table"]
+        structured_table = table_result.get("structured_table")
+        if structured_table and not structured_table.get("error"):
+            structured_table.pop("error", None)
             page = table_result.get("page", "N/A")
             
             for field, value in structured_table.items():
-                if field != "error" and value:
+                if value:
                     all_data_points.append({
                         "source": "Table",
                         "type": "Table Data",
@@ -409,8 +566,9 @@ async def process_commentary_matching(results: Dict[str, Any], document_text: Li
     if "processed_key_values" in results and results["processed_key_values"]:
         kv_data = results["processed_key_values"].get("structured_key_values", {})
         if kv_data and not kv_data.get("error"):
+            kv_data.pop("error", None)
             for field, value in kv_data.items():
-                if field != "error" and value:
+                if value:
                     all_data_points.append({
                         "source": "Key-Value Pairs",
                         "type": "Structured Data",
@@ -422,10 +580,11 @@ async def process_commentary_matching(results: Dict[str, Any], document_text: Li
     
     # From document text facts
     for chunk_idx, chunk in enumerate(results.get("processed_document_text", [])):
-        if "extracted_facts" in chunk and not chunk["extracted_facts"].get("error"):
-            facts = chunk["extracted_facts"]
+        facts = chunk.get("extracted_facts")
+        if facts and not facts.get("error"):
+            facts.pop("error", None)
             for field, value in facts.items():
-                if field != "error" and value:
+                if value:
                     all_data_points.append({
                         "source": f"Text Chunk {chunk_idx+1}",
                         "type": "Financial Data",
@@ -477,17 +636,85 @@ async def process_commentary_matching(results: Dict[str, Any], document_text: Li
         general_commentary = '\n'.join(unmatched_text_chunks[:50])  # Limit length
         results["general_commentary"] = general_commentary
     
-    # Remove duplicates and clean data
+    # Remove duplicates and clean data; numbers are compared in canonical form
     seen_data = set()
     clean_enhanced_data = []
     for item in enhanced_data:
-        key = f"{item['field']}_{item['value']}"
+        key = (item['field'], _canonical_value(item['value']))
         if key not in seen_data:
             seen_data.add(key)
             clean_enhanced_data.append(item)
     
     results["enhanced_data_with_commentary"] = clean_enhanced_data
 
-def process_structured_data_with_llm(structured_data: Dict[str, Any]) -> Dict[str, Any]:
+def _canonical_value(value: str) -> str:
+    """Canonical form of a value so "$1,200", "1200" and "1,200.00" compare equal"""
+    cleaned = _NUM_CLEAN_RE.sub('', value)
+    percent = cleaned.endswith('%')
+    number = cleaned[:-1] if percent else cleaned
+    try:
+        canonical = format(float(number), 'f').rstrip('0').rstrip('.')
+    except ValueError:
+        return value
+    return canonical + '%' if percent else canonical
+
+def process_structured_data_with_llm(structured_data: Dict[str, Any],
+                                     match_commentary: bool = True) -> Dict[str, Any]:
     """Synchronous wrapper for asynchronous processing"""
-    return asyncio.run(process_structured_data_with_llm_async(structured_data))
\ No newline at end of file
+    return asyncio.run(process_structured_data_with_llm_async(structured_data, match_commentary))
+
+def _structured_data_cache_key(structured_data: Dict[str, Any]) -> str:
+    """Stable hash of the structured data used as the result cache key"""
+    payload = json.dumps(structured_data, sort_keys=True, separators=(',', ':'))
+    return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+def _has_section_errors(results: Dict[str, Any]) -> bool:
+    """Check whether any LLM sub-stage failed, so the result should not be cached"""
+    def failed(section: Any, field: str) -> bool:
+        # A sub-result that is not an object is treated as a failure too
+        if not isinstance(section, dict):
+            return True
+        value = section.get(field, {})
+        return "error" in section or not isinstance(value, dict) or bool(value.get("error"))
+    
+    for table in results.get("processed_tables", []):
+        if failed(table, "structured_table"):
+            return True
+    kv_result = results.get("processed_key_values") or {}
+    if kv_result and failed(kv_result, "structured_key_values"):
+        return True
+    for chunk in results.get("processed_document_text", []):
+        if failed(chunk, "extracted_facts"):
+            return True
+    return False
+
+def cached_process_structured_data_with_llm(structured_data: Dict[str, Any],
+                                            match_commentary: bool = True) -> Dict[str, Any]:
+    """Process structured data, reusing the result of an identical earlier request.
+    A full result also satisfies a later request that skips commentary matching."""
+    full_key = _structured_data_cache_key(structured_data)
+    # Results without commentary matching are cached separately from full results
+    key = full_key if match_commentary else full_key + ':sections'
+    
+    with _result_cache_lock:
+        hit_key = key
+        cached = _result_cache.get(key)
+        if cached is None and not match_commentary:
+            hit_key = full_key
+            cached = _result_cache.get(full_key)
+        if cached is not None:
+            _result_cache.move_to_end(hit_key)
+    if cached is not None:
+        print(f"Using cached LLM result for {hit_key}")
+        return json.loads(cached)
+    
+    results = process_structured_data_with_llm(structured_data, match_commentary)
+    
+    if not _has_section_errors(results):
+        with _result_cache_lock:
+            _result_cache[key] = json.dumps(results)
+            _result_cache.move_to_end(key)
+            while len(_result_cache) > RESULT_CACHE_SIZE:
+                _result_cache.popitem(last=False)
+    
+    return results
@@ -1,13 +1,102 @@
 import boto3
+import os
+from botocore.config import Config
 import time
+import threading
+import re
 import uuid
-from typing import Dict, Any, List, Optional
+from datetime import datetime, timedelta, timezone
+from io import BytesIO
+from typing import Dict, Any, BinaryIO, List, Optional
+
+# boto3 clients are thread-safe, so one pooled pair is shared by every request
+# instead of paying client construction and TLS setup per upload
+_CLIENT_CONFIG = Config(max_pool_connections=32, retries={'max_attempts': 3, 'mode': 'adaptive'})
+
+# Creating clients is not thread-safe, so they are built under a lock from one
+# dedicated session rather than concurrently from boto3's default session
+_aws_session = None
+_aws_clients: Dict[str, Any] = {}
+_aws_clients_lock = threading.Lock()
+
+def _get_aws_client(service_name: str):
+    """Create the shared client for an AWS service on first use"""
+    global _aws_session
+    client = _aws_clients.get(service_name)
+    if client is None:
+        with _aws_clients_lock:
+            client = _aws_clients.get(service_name)
+            if client is None:
+                if _aws_session is None:
+                    _aws_session = boto3.session.Session()
+                client = _aws_session.client(service_name, config=_CLIENT_CONFIG)
+                _aws_clients[service_name] = client
+    return client
+
+# Footnote patterns are compiled once at import; they run on every line of every document
+_FOOTNOTE_LINE_PATTERNS = [re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'^\(\d+\)',  # (1), (2) at start of line
+    r'^\[\d+\]',  # [1], [2] at start of line
+    r'^\d+\.',    # 1., 2., 3. at start of line
+    r'^\*+\s',    # *, **, *** at start with space
+    r'^Note\s*\d*:',  # Note: or Note 1:
+    r'^Source:',  # Source:
+    r'^See\s',    # See ...
+)]
+_FOOTNOTE_REFERENCE_RE = re.compile(r'\b(?:page|section|chapter|exhibit|appendix)\s+\d+')
+_INLINE_FOOTNOTE_REF_RE = re.compile(r'[\(\[]\d+[\)\]]|\*+(?=\s|$)')
+
+_SUPERSCRIPT_RE = re.compile(r'[⁰¹²³⁴⁵⁶⁷⁸⁹]+')
+_FOOTNOTE_MARKER_PATTERNS = [re.compile(pattern) for pattern in (
+    r'\(\d+\)',    # (1), (2), etc.
+    r'\[\d+\]',    # [1], [2], etc.
+    r'\*+',        # *, **, ***, etc.
+    r'^\d+$',      # Standalone numbers on their own line
+)]
+
+# Synchronous AnalyzeDocument accepts single-page PDFs passed inline as bytes
+SYNC_ANALYZE_MAX_BYTES = 5 * 1024 * 1024
+_PDF_PAGE_RE = re.compile(rb'/Type\s*/Page(?![A-Za-z])')
+
+def _read_single_page_pdf(pdf_stream: BinaryIO) -> Optional[bytes]:
+    """Return the PDF's bytes if it is small and has exactly one page object, otherwise
+    None with the stream rewound. PDFs whose page objects sit in compressed object
+    streams show no pages here and take the S3 job path."""
+    pdf_stream.seek(0, 2)
+    size = pdf_stream.tell()
+    pdf_stream.seek(0)
+    if size > SYNC_ANALYZE_MAX_BYTES:
+        return None
+    
+    pdf_bytes = pdf_stream.read()
+    pdf_stream.seek(0)
+    if len(_PDF_PAGE_RE.findall(pdf_bytes)) == 1:
+        return pdf_bytes
+    return None
+
+# Textract job polling starts at POLL_INITIAL_SECONDS and backs off to POLL_MAX_SECONDS
+POLL_INITIAL_SECONDS = 1.0
+POLL_MAX_SECONDS = 5.0
+
+# Extraction ids handed to clients carry everything needed to collect a job on any
+# worker: "<upload id>.<start time in ms>.<Textract JobId>", the upload id naming the S3
+# key <UPLOAD_PREFIX><upload id>.pdf
+_EXTRACTION_ID_RE = re.compile(r'([0-9a-f]{32})\.(\d+)\.([A-Za-z0-9_-]+)')
+
+# A collected job deletes its own upload. Uploads of jobs whose result is never
+# collected are swept once they are older than UPLOAD_TTL_SECONDS; each process
+# sweeps at most once per UPLOAD_SWEEP_INTERVAL_SECONDS, when it starts a job
+UPLOAD_PREFIX = 'textract-input/'
+UPLOAD_TTL_SECONDS = int(os.environ.get('TEXTRACT_UPLOAD_TTL_SECONDS', 24 * 60 * 60))
+UPLOAD_SWEEP_INTERVAL_SECONDS = 60 * 60
+_last_upload_sweep = 0.0
+_upload_sweep_lock = threading.Lock()
 
 class TextractProcessor:
     def __init__(self):
-        """Initialize AWS Textract and S3 clients with credentials from environment"""
-        self.textract_client = boto3.client('textract')
-        self.s3_client = boto3.client('s3')
+        """Bind the shared AWS Textract and S3 clients (credentials from environment)"""
+        self.textract_client = _get_aws_client('textract')
+        self.s3_client = _get_aws_client('s3')
         self.bucket_name = 'textract-bucket-lk'
 
     def extract_text_from_pdf_bytes(self, pdf_bytes: bytes) -> Dict[str, Any]:
@@ -17,103 +106,171 @@ class TextractProcessor:
         Args:
             pdf_bytes (bytes): PDF file as bytes
             
+        Returns:
+            Dict[str, Any]: Structured JSON with document_text, tables, and key_values
+        """
+        return self.extract_text_from_pdf_stream(BytesIO(pdf_bytes))
+
+    def extract_text_from_pdf_stream(self, pdf_stream: BinaryIO) -> Dict[str, Any]:
+        """
+        Extract structured data from a PDF file object using Amazon Textract with S3 storage.
+        The file is streamed to S3 (multipart for large files) rather than read into memory.
+        
+        Args:
+            pdf_stream (BinaryIO): Readable binary file object positioned at the start of the PDF
+            
         Returns:
             Dict[str, Any]: Structured JSON with document_text, tables, and key_values
         """
         start_time = time.time()
         
+        # Single-page PDFs can be analyzed synchronously, skipping S3 and job polling
+        single_page_bytes = _read_single_page_pdf(pdf_stream)
+        if single_page_bytes is not None:
+            try:
+                print("Using synchronous Amazon Textract analysis for single-page PDF")
+                response = self.textract_client.analyze_document(
+                    Document={'Bytes': single_page_bytes},
+                    FeatureTypes=['TABLES', 'FORMS']
+                )
+                return self._parse_textract_blocks(response['Blocks'], start_time)
+            except Exception as e:
+                print(f"Synchronous Textract analysis failed, falling back to S3 job: {e}")
+                pdf_stream.seek(0)
+        
         try:
             print("Using Amazon Textract with S3 storage for PDF processing")
+            extraction_id = self.start_analysis_job(pdf_stream)
             
-            # Upload PDF to S3
-            file_key = f"textract-input/{uuid.uuid4()}.pdf"
-            self.s3_client.put_object(
-                Bucket=self.bucket_name,
-                Key=file_key,
-                Body=pdf_bytes,
-                ContentType='application/pdf'
-            )
-            
-            # Start document analysis
-            response = self.textract_client.start_document_analysis(
-                DocumentLocation={
-                    'S3Object': {
-                        'Bucket': self.bucket_name,
-                        'Name': file_key
-                    }
-                },
-                FeatureTypes=['TABLES', 'FORMS']
-            )
+            # Wait for job completion, polling quickly at first so short documents
+            # are not held back by a fixed 5 second interval
+            poll_interval = POLL_INITIAL_SECONDS
+            while True:
+                structured_data = self.get_analysis_result(extraction_id)
+                if structured_data is not None:
+                    return structured_data
+                time.sleep(poll_interval)
+                poll_interval = min(poll_interval * 1.5, POLL_MAX_SECONDS)
             
-            job_id = response['JobId']
-            print(f"Started Textract job: {job_id}")
+        except Exception as e:
+            print(f"Textract extraction failed: {e}")
+            raise Exception(f"Failed to extract text using Amazon Textract: {str(e)}")
+
+    def start_analysis_job(self, pdf_stream: BinaryIO) -> str:
+        """
+        Stream a PDF to S3 and start an asynchronous Textract analysis job on it.
+        
+        Args:
+            pdf_stream (BinaryIO): Readable binary file object positioned at the start of the PDF
             
-            # Wait for job completion
-            while True:
-                result = self.textract_client.get_document_analysis(JobId=job_id)
-                status = result['JobStatus']
-                print(f"Job status: {status}")
-                
-                if status in ['SUCCEEDED', 'FAILED']:
-                    break
-                
-                time.sleep(5)
+        Returns:
+            str: Extraction id, to be passed to get_analysis_result
+        """
+        start_time = time.time()
+        self._schedule_upload_sweep()
+        
+        # Stream PDF to S3
+        upload_id = uuid.uuid4().hex
+        file_key = f"{UPLOAD_PREFIX}{upload_id}.pdf"
+        self.s3_client.upload_fileobj(
+            pdf_stream,
+            self.bucket_name,
+            file_key,
+            ExtraArgs={'ContentType': 'application/pdf'}
+        )
+        
+        # Start document analysis
+        response = self.textract_client.start_document_analysis(
+            DocumentLocation={
+                'S3Object': {
+                    'Bucket': self.bucket_name,
+                    'Name': file_key
+                }
+            },
+            FeatureTypes=['TABLES', 'FORMS']
+        )
+        
+        job_id = response['JobId']
+        print(f"Started Textract job: {job_id}")
+        return f"{upload_id}.{int(start_time * 1000)}.{job_id}"
+
+    def get_analysis_result(self, extraction_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Check a Textract job started by start_analysis_job without waiting for it.
+        
+        Args:
+            extraction_id (str): Extraction id returned by start_analysis_job
             
+        Returns:
+            Optional[Dict[str, Any]]: Structured JSON with document_text, tables, and key_values,
+            or None while the job is still running
+        """
+        match = _EXTRACTION_ID_RE.fullmatch(extraction_id)
+        if not match:
+            raise ValueError(f"Invalid extraction id: {extraction_id}")
+        upload_id, start_time, job_id = match.groups()
+        file_key = f"{UPLOAD_PREFIX}{upload_id}.pdf"
+        
+        result = self.textract_client.get_document_analysis(JobId=job_id)
+        status = result['JobStatus']
+        print(f"Job status: {status}")
+        
+        if status == 'IN_PROGRESS':
+            return None
+        
+        try:
             if status == 'FAILED':
                 raise Exception("Textract job failed")
             
-            # Fetch full results (handle pagination)
-            pages = []
-            next_token = None
-            
-            while True:
-                if next_token:
-                    response = self.textract_client.get_document_analysis(JobId=job_id, NextToken=next_token)
-                else:
-                    response = self.textract_client.get_document_analysis(JobId=job_id)
-                
+            # Fetch full results (handle pagination); the status response is the first page
+            pages = list(result['Blocks'])
+            next_token = result.get('NextToken')
+            while next_token:
+                response = self.textract_client.get_document_analysis(JobId=job_id, NextToken=next_token)
                 pages.extend(response['Blocks'])
-                
                 next_token = response.get('NextToken')
-                if not next_token:
-                    break
             
             print(f"Total blocks extracted: {len(pages)}")
             
             # Parse the results
-            structured_data = self._parse_textract_blocks(pages, start_time)
-            
+            return self._parse_textract_blocks(pages, int(start_time) / 1000)
+        finally:
             # Clean up S3 file
             try:
                 self.s3_client.delete_object(Bucket=self.bucket_name, Key=file_key)
             except Exception as e:
                 print(f"Warning: Could not delete S3 file: {e}")
-            
-            return structured_data
-            
+
+    def _schedule_upload_sweep(self) -> None:
+        """Start a background sweep of stale uploads unless this process ran one recently"""
+        global _last_upload_sweep
+        with _upload_sweep_lock:
+            now = time.time()
+            if now - _last_upload_sweep < UPLOAD_SWEEP_INTERVAL_SECONDS:
+                return
+            _last_upload_sweep = now
+        threading.Thread(target=self._sweep_stale_uploads, daemon=True).start()
+
+    def _sweep_stale_uploads(self) -> None:
+        """Delete uploads under UPLOAD_PREFIX older than UPLOAD_TTL_SECONDS"""
+        cutoff = datetime.now(timezone.utc) - timedelta(seconds=UPLOAD_TTL_SECONDS)
+        try:
+            paginator = self.s3_client.get_paginator('list_objects_v2')
+            for page in paginator.paginate(Bucket=self.bucket_name, Prefix=UPLOAD_PREFIX):
+                # Pages hold at most 1000 keys, the delete_objects limit
+                stale = [{'Key': obj['Key']} for obj in page.get('Contents', []) if obj['LastModified'] < cutoff]
+                if stale:
+                    self.s3_client.delete_objects(Bucket=self.bucket_name, Delete={'Objects': stale, 'Quiet': True})
+                    print(f"Removed {len(stale)} stale Textract uploads from S3")
         except Exception as e:
-            print(f"Textract extraction failed: {e}")
-            raise Exception(f"Failed to extract text using Amazon Textract: {str(e)}")
+            print(f"Warning: Could not sweep stale S3 uploads: {e}")
 
     def _enhance_footnote_detection(self, document_text):
         """Enhanced footnote detection and processing"""
-        import re
-        
         footnotes = []
         enhanced_text = []
         footnote_markers = {}
         
-        # Common footnote patterns
-        footnote_patterns = [
-            r'^\(\d+\)',  # (1), (2) at start of line
-            r'^\[\d+\]',  # [1], [2] at start of line
-            r'^\d+\.',    # 1., 2., 3. at start of line
-            r'^\*+\s',    # *, **, *** at start with space
-            r'^Note\s*\d*:',  # Note: or Note 1:
-            r'^Source:',  # Source:
-            r'^See\s',    # See ...
-        ]
-        
         for i, line in enumerate(document_text):
             line_stripped = line.strip()
             if not line_stripped:
@@ -123,8 +280,8 @@ class TextractProcessor:
             is_footnote = False
             footnote_marker = None
             
-            for pattern in footnote_patterns:
-                match = re.match(pattern, line_stripped, re.IGNORECASE)
+            for pattern in _FOOTNOTE_LINE_PATTERNS:
+                match = pattern.match(line_stripped)
                 if match:
                     footnote_marker = match.group()
                     # Additional checks for footnote characteristics
@@ -132,7 +289,7 @@ class TextractProcessor:
                         (any(word in line_stripped.lower() for word in 
                              ['note', 'source', 'see', 'reference', 'pursuant', 'accordance', 
                               'disclaimer', 'based on', 'refers to', 'includes', 'excludes']) or
-                         re.search(r'\b(?:page|section|chapter|exhibit|appendix)\s+\d+', line_stripped.lower()))):
+                         _FOOTNOTE_REFERENCE_RE.search(line_stripped.lower()))):
                         is_footnote = True
                         break
             
@@ -146,7 +303,7 @@ class TextractProcessor:
                 footnote_markers[footnote_marker] = line_stripped
             else:
                 # Check for inline footnote references
-                has_refs = bool(re.search(r'[\(\[]\d+[\)\]]|\*+(?=\s|$)', line_stripped))
+                has_refs = bool(_INLINE_FOOTNOTE_REF_RE.search(line_stripped))
                 enhanced_text.append({
                     'content': line_stripped,
                     'has_footnote_refs': has_refs,
@@ -161,22 +318,12 @@ class TextractProcessor:
 
     def _remove_superscript_numbers(self, text):
         """Remove superscript numbers and common footnote markers from text"""
-        import re
-        
         # Remove superscript numbers (Unicode superscript characters)
-        superscript_pattern = r'[⁰¹²³⁴⁵⁶⁷⁸⁹]+'
-        text = re.sub(superscript_pattern, '', text)
+        text = _SUPERSCRIPT_RE.sub('', text)
         
         # Remove common footnote reference patterns
-        footnote_patterns = [
-            r'\(\d+\)',    # (1), (2), etc.
-            r'\[\d+\]',    # [1], [2], etc.
-            r'\*+',        # *, **, ***, etc.
-            r'^\d+$',      # Standalone numbers on their own line
-        ]
-        
-        for pattern in footnote_patterns:
-            text = re.sub(pattern, '', text)
+        for pattern in _FOOTNOTE_MARKER_PATTERNS:
+            text = pattern.sub('', text)
         
         # Clean up extra whitespace
         text = ' '.join(text.split())
@@ -268,32 +415,15 @@ class TextractProcessor:
         if not cells:
             return None
         
-        # Organize cells by row and column
-        table_structure = {}
-        max_row = 0
-        max_col = 0
+        # Size the grid from the cell indices, then fill it in place
+        positions = [(cell.get('RowIndex', 1) - 1, cell.get('ColumnIndex', 1) - 1) for cell in cells]  # Convert to 0-based
+        max_row = max(0, max(row_index for row_index, _ in positions))
+        max_col = max(0, max(col_index for _, col_index in positions))
         
-        for cell in cells:
-            row_index = cell.get('RowIndex', 1) - 1  # Convert to 0-based
-            col_index = cell.get('ColumnIndex', 1) - 1  # Convert to 0-based
-            
-            max_row = max(max_row, row_index)
-            max_col = max(max_col, col_index)
-            
-            cell_text = self._get_cell_text(cell, block_map)
-            
-            if row_index not in table_structure:
-                table_structure[row_index] = {}
-            table_structure[row_index][col_index] = cell_text
-        
-        # Convert to list of lists (rows)
-        rows = []
-        for row_idx in range(max_row + 1):
-            row = []
-            for col_idx in range(max_col + 1):
-                cell_value = table_structure.get(row_idx, {}).get(col_idx, "")
-                row.append(cell_value)
-            rows.append(row)
+        rows = [[""] * (max_col + 1) for _ in range(max_row + 1)]
+        for cell, (row_index, col_index) in zip(cells, positions):
+            if row_index >= 0 and col_index >= 0:
+                rows[row_index][col_index] = self._get_cell_text(cell, block_map)
         
         return {
             "page": page_num,
@@ -393,6 +523,49 @@ def extract_structured_data_from_pdf_bytes(pdf_bytes: bytes) -> Dict[str, Any]:
     return processor.extract_text_from_pdf_bytes(pdf_bytes)
 
 
+def extract_structured_data_from_pdf_stream(pdf_stream: BinaryIO) -> Dict[str, Any]:
+    """
+    Main function to extract structured data from a PDF file object using Amazon Textract.
+    
+    Args:
+        pdf_stream (BinaryIO): Readable binary file object containing the PDF
+        
+    Returns:
+        Dict[str, Any]: Structured JSON with document_text, tables, and key_values
+    """
+    processor = TextractProcessor()
+    return processor.extract_text_from_pdf_stream(pdf_stream)
+
+
+def start_structured_data_extraction(pdf_stream: BinaryIO) -> str:
+    """
+    Start extracting structured data from a PDF file object without waiting for Textract.
+    
+    Args:
+        pdf_stream (BinaryIO): Readable binary file object containing the PDF
+        
+    Returns:
+        str: Opaque job id to pass to get_structured_data_extraction
+    """
+    processor = TextractProcessor()
+    return processor.start_analysis_job(pdf_stream)
+
+
+def get_structured_data_extraction(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Collect the structured data of an extraction started by start_structured_data_extraction.
+    
+    Args:
+        job_id (str): Job id returned when the extraction was started
+        
+    Returns:
+        Optional[Dict[str, Any]]: Structured JSON with document_text, tables, and key_values,
+        or None while Textract is still running
+    """
+    processor = TextractProcessor()
+    return processor.get_analysis_result(job_id)
+
+
 def extract_text_from_pdf(pdf_path: str) -> str:
     """
     Main function to extract raw text from PDF file using Amazon Textract.
@@ -0,0 +1,6 @@
+from app import app
+
+# Production entry point. Threaded workers keep long /process_stream
+# responses from blocking other requests, and --timeout 0 stops the
+# arbiter from killing streams that wait on the LLM:
+#   gunicorn --worker-class gthread --workers 2 --threads 16 --timeout 0 --bind 0.0.0.0:5000 wsgi:app